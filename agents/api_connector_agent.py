@@ -1,12 +1,27 @@
 import logging
 import json
 import hashlib
+import os
 from agents.basic_agent import BasicAgent
 from utils.azure_file_storage import AzureFileStorageManager
+from utils.shared_patterns import SharedPatterns
 from datetime import datetime
 import re
 
 class APIConnectorAgent(BasicAgent):
+    # Learned patterns are shared by all instances, re-read from Azure at most
+    # once per TTL and written back by a background flusher instead of
+    # rewriting the whole file on every successful call
+    _shared_api_patterns = SharedPatterns(
+        'api-pattern-flusher',
+        ttl=float(os.environ.get('API_PATTERNS_TTL', '300')),
+        flush_interval=float(os.environ.get('API_PATTERN_FLUSH_INTERVAL', '5')),
+        snapshot=lambda patterns: {
+            pattern_id: dict(pattern, successful_params=list(pattern.get('successful_params', [])))
+            for pattern_id, pattern in patterns.items()
+        }
+    )
+
     def __init__(self):
         self.name = 'APIConnector'
         self.metadata = {
@@ -70,31 +85,41 @@ class APIConnectorAgent(BasicAgent):
             }
         }
         self.storage_manager = AzureFileStorageManager()
-        self.api_patterns = self._load_api_patterns()
+        self._load_api_patterns()
         self.auth_configs = self._load_auth_configs()
         super().__init__(name=self.name, metadata=self.metadata)
 
+    @property
+    def api_patterns(self):
+        """Learned API patterns shared by every instance in this process."""
+        return self._load_api_patterns()
+
     def _load_api_patterns(self):
-        """Load learned API patterns."""
+        """Load learned API patterns, re-reading Azure only once the TTL expires."""
+        return self._shared_api_patterns.load(self._read_api_patterns, dict)
+
+    def _read_api_patterns(self):
+        """Read learned API patterns from Azure, or None if unavailable."""
         try:
             patterns = self.storage_manager.read_json_from_path(
                 "api_patterns",
                 "patterns.json"
             )
-            return patterns if patterns else {}
+            return patterns if patterns else None
         except Exception:
-            return {}
+            return None
 
-    def _save_api_patterns(self):
-        """Save learned API patterns."""
+    def _save_api_patterns(self, snapshot):
+        """Save a snapshot of the learned API patterns."""
         try:
-            self.storage_manager.write_json_to_path(
-                self.api_patterns,
+            return self.storage_manager.write_json_to_path(
+                snapshot,
                 "api_patterns",
                 "patterns.json"
             )
         except Exception as e:
             logging.error(f"Error saving API patterns: {str(e)}")
+            return False
 
     def _load_auth_configs(self):
         """Load saved authentication configurations."""
@@ -349,44 +374,49 @@ class APIConnectorAgent(BasicAgent):
         try:
             # Create pattern ID
             pattern_id = hashlib.md5(f"{endpoint}_{method}".encode()).hexdigest()[:12]
+            now_iso = datetime.now().isoformat()
+            response_schema = self._extract_schema(result['data']) if result.get('data') else None
             
-            if pattern_id not in self.api_patterns:
-                self.api_patterns[pattern_id] = {
-                    'endpoint': endpoint,
-                    'method': method,
-                    'successful_params': [],
-                    'response_schema': None,
-                    'avg_response_time': 0,
-                    'success_count': 0,
-                    'learned_at': datetime.now().isoformat()
-                }
-            
-            # Update pattern
-            pattern = self.api_patterns[pattern_id]
-            pattern['success_count'] += 1
+            self._load_api_patterns()
+            with self._shared_api_patterns.lock:
+                api_patterns = self._shared_api_patterns.patterns
+                if pattern_id not in api_patterns:
+                    api_patterns[pattern_id] = {
+                        'endpoint': endpoint,
+                        'method': method,
+                        'successful_params': [],
+                        'response_schema': None,
+                        'avg_response_time': 0,
+                        'success_count': 0,
+                        'learned_at': now_iso
+                    }
             
-            # Store successful parameters
-            if params:
-                pattern['successful_params'].append({
-                    'params': params,
-                    'timestamp': datetime.now().isoformat()
-                })
-                # Keep only last 10 examples
-                if len(pattern['successful_params']) > 10:
-                    pattern['successful_params'] = pattern['successful_params'][-10:]
+                # Update pattern
+                pattern = api_patterns[pattern_id]
+                pattern['success_count'] += 1
             
-            # Update response time average
-            if 'response_time' in result:
-                current_avg = pattern['avg_response_time']
-                count = pattern['success_count']
-                new_avg = ((current_avg * (count - 1)) + result['response_time']) / count
-                pattern['avg_response_time'] = new_avg
+                # Store successful parameters
+                if params:
+                    pattern['successful_params'].append({
+                        'params': params,
+                        'timestamp': now_iso
+                    })
+                    # Keep only last 10 examples
+                    if len(pattern['successful_params']) > 10:
+                        pattern['successful_params'] = pattern['successful_params'][-10:]
             
-            # Learn response schema
-            if result.get('data'):
-                pattern['response_schema'] = self._extract_schema(result['data'])
+                # Update response time average
+                if 'response_time' in result:
+                    current_avg = pattern['avg_response_time']
+                    count = pattern['success_count']
+                    new_avg = ((current_avg * (count - 1)) + result['response_time']) / count
+                    pattern['avg_response_time'] = new_avg
             
-            self._save_api_patterns()
+                # Learn response schema
+                if response_schema is not None:
+                    pattern['response_schema'] = response_schema
+                
+                self._shared_api_patterns.changed(self._save_api_patterns)
             
         except Exception as e:
             logging.error(f"Error learning API pattern: {str(e)}")
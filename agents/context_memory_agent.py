@@ -1,6 +1,7 @@
 # PASTE THE CONTENT OF context_memory_agent.py HERE
 # From the artifact "context_memory_agent.py - Memory Recall Agent"
 import logging
+import re
 from agents.basic_agent import BasicAgent
 from utils.azure_file_storage import AzureFileStorageManager
 
@@ -110,13 +111,12 @@ class ContextMemoryAgent(BasicAgent):
             
         # Filter by keywords if provided
         if keywords and len(keywords) > 0:
+            # One case-insensitive pass per field instead of a scan per keyword
+            keyword_search = re.compile('|'.join(re.escape(keyword) for keyword in keywords), re.IGNORECASE).search
             filtered_memories = []
             for memory in memories:
-                content = str(memory.get('message', '')).lower()
-                theme = str(memory.get('theme', '')).lower()
-                
-                if any(keyword.lower() in content for keyword in keywords) or \
-                   any(keyword.lower() in theme for keyword in keywords):
+                if keyword_search(str(memory.get('message', ''))) or \
+                   keyword_search(str(memory.get('theme', ''))):
                     filtered_memories.append(memory)
             
             if filtered_memories:
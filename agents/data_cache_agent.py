@@ -277,12 +277,16 @@ class DataCacheAgent(BasicAgent):
             except Exception as e:
                 logging.warning(f"Could not create directory {directory}: {str(e)}")
     
+    def _hash_key(self, key):
+        """Fixed-length storage key for a cache key; not used for security."""
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
     def cache_data(self, key, data, ttl=None):
         """Cache data with optional TTL."""
         if ttl is None:
             ttl = self.cache_ttl
         
-        cache_key = hashlib.md5(key.encode()).hexdigest()
+        cache_key = self._hash_key(key)
         cache_entry = {
             'data': data,
             'timestamp': datetime.now().isoformat(),
@@ -311,7 +315,7 @@ class DataCacheAgent(BasicAgent):
     
     def get_cached_data(self, key):
         """Retrieve cached data if still valid."""
-        cache_key = hashlib.md5(key.encode()).hexdigest()
+        cache_key = self._hash_key(key)
         
         # Check local cache first
         if cache_key in self.local_cache:
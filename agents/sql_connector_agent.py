@@ -1,11 +1,89 @@
+import gzip
 import logging
 import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from agents.basic_agent import BasicAgent
 from utils.azure_file_storage import AzureFileStorageManager
+from utils.shared_patterns import SharedPatterns
 from datetime import datetime
 import hashlib
 
+# Quoted strings and bare numbers, matched in one pass by _extract_query_pattern
+_QUERY_LITERAL_RE = re.compile(r"'[^']*'|\"[^\"]*\"|\b\d+\b")
+
+# Database type keywords and connection-string keys for _parse_connection_string
+_DB_TYPE_RE = re.compile(r'mysql|postgres(?:ql)?|sqlserver|mssql|sqlite|oracle')
+_DB_TYPE_ALIASES = {'postgres': 'postgresql', 'mssql': 'sqlserver'}
+_DB_KEY_MAP = {
+    'server': 'host',
+    'host': 'host',
+    'data source': 'host',
+    'database': 'database',
+    'initial catalog': 'database',
+    'user': 'user',
+    'user id': 'user',
+    'uid': 'user',
+    'password': 'password',
+    'pwd': 'password'
+}
+
+# Keywords checked by suggest_optimizations on the uppercased query. All of them
+# are compiled into one alternation of named groups, so adding a trigger here
+# keeps the scan to a single pass
+_SUGGESTION_KEYWORDS = {
+    'select_star': r'SELECT\s+\*',
+    'join': r'\bJOIN\b',
+    'index': r'\bINDEX\b'
+}
+_SUGGESTION_KEYWORD_RE = re.compile('|'.join(
+    f'(?P<{name}>{regex})' for name, regex in _SUGGESTION_KEYWORDS.items()
+))
+
+def _static_query_flags(query_upper):
+    """Flags behind the keyword-based suggestions, for an uppercased query or pattern."""
+    keywords = {m.lastgroup for m in _SUGGESTION_KEYWORD_RE.finditer(query_upper)}
+    return {
+        'select_star': 'select_star' in keywords,
+        'join_without_index': 'join' in keywords and 'index' not in keywords
+    }
+
+def _literal_placeholder(match):
+    """Map a matched literal to its placeholder, keeping the quote style."""
+    first = match.group(0)[0]
+    if first == "'":
+        return "'?'"
+    if first == '"':
+        return '"?"'
+    return '?'
+
 class SQLConnectorAgent(BasicAgent):
+    # Process-local result cache in front of Azure File Storage, shared by all instances
+    _result_cache = OrderedDict()
+    _result_cache_lock = threading.Lock()
+    _result_cache_size = int(os.environ.get('SQL_RESULT_CACHE_SIZE', '1024'))
+    _result_cache_ttl = float(os.environ.get('SQL_RESULT_CACHE_TTL', '300'))
+
+    # Post-query bookkeeping (pattern learning, Azure cache writes) runs here
+    _io_executor = ThreadPoolExecutor(max_workers=8)
+
+    # Learned patterns are shared by all instances, bounded, re-read from Azure
+    # at most once per TTL and written back by a background flusher
+    _max_query_patterns = int(os.environ.get('SQL_MAX_QUERY_PATTERNS', '5000'))
+    _shared_query_patterns = SharedPatterns(
+        'sql-pattern-flusher',
+        ttl=float(os.environ.get('SQL_QUERY_PATTERNS_TTL', '300')),
+        flush_interval=float(os.environ.get('SQL_PATTERN_FLUSH_INTERVAL', '5')),
+        snapshot=lambda patterns: {
+            pattern: dict(info, examples=list(info.get('examples', [])))
+            for pattern, info in patterns.items()
+        }
+    )
+
     def __init__(self):
         self.name = 'SQLConnector'
         self.metadata = {
@@ -44,30 +122,88 @@ class SQLConnectorAgent(BasicAgent):
             }
         }
         self.storage_manager = AzureFileStorageManager()
-        self.query_patterns = self._load_query_patterns()
+        self._load_query_patterns()
+        self._operations = {
+            'schema': lambda db_info, query, parameters: self._get_database_schema(db_info),
+            'query': self._execute_query,
+            'insert': self._execute_insert,
+            'update': self._execute_update,
+            'delete': self._execute_delete
+        }
         super().__init__(name=self.name, metadata=self.metadata)
 
+    @property
+    def query_patterns(self):
+        """Learned query patterns shared by every instance in this process."""
+        return self._load_query_patterns()
+
     def _load_query_patterns(self):
-        """Load learned query patterns."""
+        """Load learned query patterns, re-reading Azure only once the TTL expires."""
+        return self._shared_query_patterns.load(self._read_query_patterns, OrderedDict)
+
+    def _read_query_patterns(self):
+        """Read learned query patterns from Azure, or None if unavailable."""
         try:
-            patterns = self.storage_manager.read_json_from_path(
+            compressed = self.storage_manager.read_file_binary(
                 "query_templates",
-                "sql_patterns.json"
+                "sql_patterns.json.gz"
             )
-            return patterns if patterns else {}
+            if compressed:
+                patterns = json.loads(gzip.decompress(compressed))
+            else:
+                # Fall back to the legacy uncompressed file
+                patterns = self.storage_manager.read_json_from_path(
+                    "query_templates",
+                    "sql_patterns.json"
+                )
+            if not patterns:
+                return None
+            # Key by the canonical pattern (older files used a hash of it) and
+            # keep the examples, stored as lists, bounded in memory
+            loaded = OrderedDict()
+            for key, info in patterns.items():
+                info['examples'] = deque(info.get('examples', []), maxlen=10)
+                loaded[info.get('pattern', key)] = info
+            return loaded
         except Exception:
-            return {}
+            return None
 
-    def _save_query_patterns(self):
-        """Save learned query patterns."""
+    def _save_query_patterns(self, snapshot):
+        """Save a snapshot of the learned query patterns, gzip-compressed."""
         try:
-            self.storage_manager.write_json_to_path(
-                self.query_patterns,
-                "query_templates",
-                "sql_patterns.json"
+            # Entries repeat the same keys, so even the fastest level compresses well
+            payload = gzip.compress(
+                json.dumps(snapshot, ensure_ascii=False).encode('utf-8'),
+                compresslevel=1
             )
+            if self.storage_manager.write_file("query_templates", "sql_patterns.json.gz", payload):
+                return True
+            logging.error("Error saving query patterns: write to Azure failed")
         except Exception as e:
             logging.error(f"Error saving query patterns: {str(e)}")
+        return False
+
+    def _get_local_cached_data(self, cache_key):
+        """Return a result from the process-local cache if present and fresh."""
+        with self._result_cache_lock:
+            entry = self._result_cache.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if time.monotonic() >= expires_at:
+                del self._result_cache[cache_key]
+                return None
+            self._result_cache.move_to_end(cache_key)
+            return data
+
+    def _set_local_cached_data(self, cache_key, data, ttl=None):
+        """Store a result in the process-local cache for at most ttl seconds, evicting the oldest entries."""
+        ttl = self._result_cache_ttl if ttl is None else min(ttl, self._result_cache_ttl)
+        with self._result_cache_lock:
+            self._result_cache[cache_key] = (time.monotonic() + ttl, data)
+            self._result_cache.move_to_end(cache_key)
+            while len(self._result_cache) > self._result_cache_size:
+                self._result_cache.popitem(last=False)
 
     def perform(self, **kwargs):
         """Execute SQL operations with learning capabilities."""
@@ -82,10 +218,19 @@ class SQLConnectorAgent(BasicAgent):
             return "Error: Connection string is required"
         
         try:
-            # Check cache first if caching is enabled
+            cache_key = None
             if cache_result and query:
-                cache_key = f"{connection_string}_{query}_{json.dumps(parameters, sort_keys=True)}"
-                cached_data = self.storage_manager.get_cached_data(cache_key)
+                cache_key = f"{connection_string}_{query}_{json.dumps(parameters, sort_keys=True, separators=(',', ':'))}"
+
+            # Check cache first if caching is enabled
+            if cache_key:
+                cached_data = self._get_local_cached_data(cache_key)
+                if cached_data is None:
+                    # Keep an Azure hit locally only for the rest of its Azure lifetime
+                    cached = self.storage_manager.get_cached_entry(cache_key)
+                    cached_data, remaining = cached if cached else (None, 0)
+                    if cached_data:
+                        self._set_local_cached_data(cache_key, cached_data, remaining)
                 if cached_data:
                     logging.info(f"Returning cached result for SQL query")
                     return json.dumps({
@@ -98,27 +243,19 @@ class SQLConnectorAgent(BasicAgent):
             db_info = self._parse_connection_string(connection_string)
             
             # Execute operation based on type
-            if operation == 'schema':
-                result = self._get_database_schema(db_info)
-            elif operation == 'query':
-                result = self._execute_query(db_info, query, parameters)
-            elif operation == 'insert':
-                result = self._execute_insert(db_info, query, parameters)
-            elif operation == 'update':
-                result = self._execute_update(db_info, query, parameters)
-            elif operation == 'delete':
-                result = self._execute_delete(db_info, query, parameters)
-            else:
+            execute = self._operations.get(operation)
+            if execute is None:
                 return f"Error: Unknown operation type: {operation}"
+            result = execute(db_info, query, parameters)
             
-            # Learn from successful queries
+            # Learn from successful queries and cache their results in the background;
+            # the process-local cache serves repeats until the Azure write lands
             if learn_pattern and query and result.get('status') == 'success':
-                self._learn_query_pattern(query, parameters, result)
+                self._io_executor.submit(self._learn_query_pattern, query, parameters, result)
             
-            # Cache successful results
-            if cache_result and result.get('status') == 'success' and query:
-                cache_key = f"{connection_string}_{query}_{json.dumps(parameters, sort_keys=True)}"
-                self.storage_manager.cache_data(cache_key, result.get('data'))
+            if cache_key and result.get('status') == 'success':
+                self._set_local_cached_data(cache_key, result.get('data'))
+                self._io_executor.submit(self.storage_manager.cache_data, cache_key, result.get('data'))
             
             return json.dumps(result)
             
@@ -141,34 +278,19 @@ class SQLConnectorAgent(BasicAgent):
         }
         
         # Check for common database types
-        if 'mysql' in connection_string.lower():
-            db_info['type'] = 'mysql'
-        elif 'postgresql' in connection_string.lower() or 'postgres' in connection_string.lower():
-            db_info['type'] = 'postgresql'
-        elif 'sqlserver' in connection_string.lower() or 'mssql' in connection_string.lower():
-            db_info['type'] = 'sqlserver'
-        elif 'sqlite' in connection_string.lower():
-            db_info['type'] = 'sqlite'
-        elif 'oracle' in connection_string.lower():
-            db_info['type'] = 'oracle'
+        match = _DB_TYPE_RE.search(connection_string.lower())
+        if match:
+            db_type = match.group(0)
+            db_info['type'] = _DB_TYPE_ALIASES.get(db_type, db_type)
         
         # Parse connection parameters (simplified)
         # In production, use proper URL parsing
-        parts = connection_string.split(';')
-        for part in parts:
+        for part in connection_string.split(';'):
             if '=' in part:
                 key, value = part.split('=', 1)
-                key = key.lower().strip()
-                value = value.strip()
-                
-                if key in ['server', 'host', 'data source']:
-                    db_info['host'] = value
-                elif key in ['database', 'initial catalog']:
-                    db_info['database'] = value
-                elif key in ['user', 'user id', 'uid']:
-                    db_info['user'] = value
-                elif key in ['password', 'pwd']:
-                    db_info['password'] = value
+                field = _DB_KEY_MAP.get(key.lower().strip())
+                if field:
+                    db_info[field] = value.strip()
         
         return db_info
 
@@ -260,73 +382,66 @@ class SQLConnectorAgent(BasicAgent):
     def _learn_query_pattern(self, query, parameters, result):
         """Learn from successful query patterns."""
         try:
-            # Extract query pattern
+            # Extract query pattern; the canonical pattern is its own key
             pattern = self._extract_query_pattern(query)
-            pattern_id = hashlib.md5(pattern.encode()).hexdigest()[:12]
-            
-            if pattern_id not in self.query_patterns:
-                self.query_patterns[pattern_id] = {
-                    'pattern': pattern,
-                    'examples': [],
-                    'success_count': 0,
-                    'avg_rows_returned': 0,
-                    'learned_at': datetime.now().isoformat()
-                }
-            
-            # Update pattern statistics
-            self.query_patterns[pattern_id]['success_count'] += 1
-            self.query_patterns[pattern_id]['examples'].append({
-                'query': query,
-                'parameters': parameters,
-                'timestamp': datetime.now().isoformat()
-            })
+            now_iso = datetime.now().isoformat()
             
-            # Keep only last 10 examples
-            if len(self.query_patterns[pattern_id]['examples']) > 10:
-                self.query_patterns[pattern_id]['examples'] = \
-                    self.query_patterns[pattern_id]['examples'][-10:]
-            
-            # Update average rows returned for SELECT queries
-            if result.get('rows_returned') is not None:
-                current_avg = self.query_patterns[pattern_id]['avg_rows_returned']
-                count = self.query_patterns[pattern_id]['success_count']
-                new_avg = ((current_avg * (count - 1)) + result['rows_returned']) / count
-                self.query_patterns[pattern_id]['avg_rows_returned'] = new_avg
-            
-            self._save_query_patterns()
+            self._load_query_patterns()
+            with self._shared_query_patterns.lock:
+                patterns = self._shared_query_patterns.patterns
+                stats = patterns.get(pattern)
+                if stats is None:
+                    stats = patterns[pattern] = {
+                        'pattern': pattern,
+                        'examples': deque(maxlen=10),
+                        'success_count': 0,
+                        'avg_rows_returned': 0,
+                        'learned_at': now_iso,
+                        'static_flags': _static_query_flags(pattern)
+                    }
+                    # Evict the least recently used patterns beyond the cap
+                    while len(patterns) > self._max_query_patterns:
+                        patterns.popitem(last=False)
+                else:
+                    patterns.move_to_end(pattern)
+                
+                # Update pattern statistics; examples keep only the last 10
+                stats['success_count'] += 1
+                stats['examples'].append({
+                    'query': query,
+                    'parameters': parameters,
+                    'timestamp': now_iso
+                })
+                
+                # Update running average rows returned for SELECT queries
+                rows = result.get('rows_returned')
+                if rows is not None:
+                    stats['avg_rows_returned'] += (rows - stats['avg_rows_returned']) / stats['success_count']
+                
+                self._shared_query_patterns.changed(self._save_query_patterns)
             
         except Exception as e:
             logging.error(f"Error learning query pattern: {str(e)}")
 
-    def _extract_query_pattern(self, query):
-        """Extract pattern from SQL query."""
-        # Remove values and keep structure
-        pattern = query.upper()
-        
-        # Replace specific values with placeholders
-        import re
-        
-        # Replace quoted strings
-        pattern = re.sub(r"'[^']*'", "'?'", pattern)
-        pattern = re.sub(r'"[^"]*"', '"?"', pattern)
-        
-        # Replace numbers
-        pattern = re.sub(r'\b\d+\b', '?', pattern)
-        
-        # Remove extra spaces
-        pattern = ' '.join(pattern.split())
-        
-        return pattern
+    def _extract_query_pattern(self, query, pre_upper=False):
+        """Extract pattern from SQL query.
+
+        Pass pre_upper=True when the query has already been uppercased.
+        """
+        # Replace quoted strings and numbers with placeholders in a single pass,
+        # then collapse extra spaces
+        pattern = _QUERY_LITERAL_RE.sub(_literal_placeholder, query if pre_upper else query.upper())
+        return ' '.join(pattern.split())
 
     def suggest_optimizations(self, query):
         """Suggest query optimizations based on learned patterns."""
-        pattern = self._extract_query_pattern(query)
-        pattern_id = hashlib.md5(pattern.encode()).hexdigest()[:12]
+        query_upper = query.upper()
+        pattern = self._extract_query_pattern(query_upper, pre_upper=True)
         
         suggestions = []
         
-        if pattern_id in self.query_patterns:
-            pattern_info = self.query_patterns[pattern_id]
+        pattern_info = self.query_patterns.get(pattern)
+        if pattern_info is not None:
             
             # Suggest based on average rows returned
             if pattern_info['avg_rows_returned'] > 1000:
@@ -344,17 +459,21 @@ class SQLConnectorAgent(BasicAgent):
                     'priority': 'medium'
                 })
         
-        # General suggestions based on query analysis
-        query_upper = query.upper()
+        # General suggestions based on query analysis. Flags always come from the
+        # pattern, with literals replaced, so a query gets the same suggestions
+        # before and after it is learned; known patterns carry them precomputed
+        flags = pattern_info.get('static_flags') if pattern_info is not None else None
+        if flags is None:
+            flags = _static_query_flags(pattern)
         
-        if 'SELECT *' in query_upper:
+        if flags['select_star']:
             suggestions.append({
                 'type': 'performance',
                 'suggestion': 'Avoid SELECT *. Specify only needed columns.',
                 'priority': 'medium'
             })
         
-        if 'JOIN' in query_upper and 'INDEX' not in query_upper:
+        if flags['join_without_index']:
             suggestions.append({
                 'type': 'performance',
                 'suggestion': 'Ensure proper indexes exist on JOIN columns.',
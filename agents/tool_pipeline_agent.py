@@ -0,0 +1,105 @@
+import logging
+import json
+from agents.basic_agent import BasicAgent
+
+class ToolPipelineAgent(BasicAgent):
+    def __init__(self):
+        self.name = "ToolPipeline"
+        self.metadata = {
+            "name": self.name,
+            "description": "Runs a fixed sequence of agents in one call, feeding each step's output into the next. Use this instead of calling agents one at a time when the order of steps is already known (e.g. connect, then query, then transform).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "steps": {
+                        "type": "array",
+                        "description": "Ordered agent calls to run",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "agent": {
+                                    "type": "string",
+                                    "description": "Name of the agent to call"
+                                },
+                                "parameters": {
+                                    "type": "object",
+                                    "description": "Parameters for this agent call"
+                                },
+                                "input_parameter": {
+                                    "type": "string",
+                                    "description": "Parameter that receives the previous step's output (optional)"
+                                }
+                            },
+                            "required": ["agent"]
+                        }
+                    }
+                },
+                "required": ["steps"]
+            }
+        }
+        super().__init__(name=self.name, metadata=self.metadata)
+
+    def perform(self, **kwargs):
+        """
+        Run each step in order, passing the previous output forward. Steps are
+        executed by run_agent(agent_name, parameters), supplied by the caller.
+        """
+        steps = kwargs.get('steps') or []
+        run_agent = kwargs.get('run_agent')
+
+        if not callable(run_agent):
+            return json.dumps({
+                "status": "error",
+                "error": "No agent runner was provided for this pipeline"
+            })
+
+        if not isinstance(steps, list) or not steps:
+            return json.dumps({
+                "status": "error",
+                "error": "steps must be a non-empty list of agent calls"
+            })
+
+        completed = []
+        previous_output = None
+
+        for index, step in enumerate(steps):
+            agent_name = str(step.get('agent', '')) if isinstance(step, dict) else ''
+
+            if not agent_name or agent_name == self.name:
+                return json.dumps({
+                    "status": "error",
+                    "error": f"Step {index + 1}: agent '{agent_name}' is not available",
+                    "steps": completed
+                })
+
+            parameters = step.get('parameters') or {}
+            if not isinstance(parameters, dict):
+                return json.dumps({
+                    "status": "error",
+                    "error": f"Step {index + 1} ({agent_name}): parameters must be an object",
+                    "steps": completed
+                })
+
+            parameters = dict(parameters)
+            input_parameter = step.get('input_parameter')
+            if input_parameter and previous_output is not None:
+                parameters[input_parameter] = previous_output
+
+            try:
+                previous_output = run_agent(agent_name, parameters)
+            except Exception as e:
+                logging.error(f"Error in pipeline step {index + 1} ({agent_name}): {str(e)}")
+                return json.dumps({
+                    "status": "error",
+                    "error": f"Step {index + 1} ({agent_name}) failed: {str(e)}",
+                    "steps": completed
+                })
+
+            completed.append({"agent": agent_name, "result": previous_output})
+
+        return json.dumps({
+            "status": "success",
+            "steps": completed,
+            "output": previous_output
+        })
+
@@ -0,0 +1,28 @@
+"""
+Rebuilds the agent manifests on the Azure File Share.
+
+The function app reads agents/_manifest.json and multi_agents/_manifest.json
+in a single request each instead of listing and reading every agent file.
+Run this after uploading or editing agent files on the share:
+
+    python build_agent_manifest.py [directory ...]
+
+Requires AzureWebJobsStorage (and AZURE_FILES_SHARE_NAME if not the default)
+in the environment. Delete a directory's manifest to go back to per-file loading.
+"""
+import sys
+from utils.azure_file_storage import AzureFileStorageManager
+
+def main(directories):
+    storage_manager = AzureFileStorageManager()
+    ok = True
+    for directory in directories:
+        if storage_manager.write_agent_manifest(directory):
+            print(f"Wrote {directory} manifest")
+        else:
+            print(f"Failed to write {directory} manifest")
+            ok = False
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:] or ['agents', 'multi_agents']))
@@ -3,7 +3,9 @@ import json
 import logging
 import base64
 import mimetypes
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
 from agents.basic_agent import BasicAgent
 from utils.azure_file_storage import AzureFileStorageManager
 
@@ -16,7 +18,22 @@ except ImportError:
     GEMINI_AVAILABLE = False
     logging.warning("Google Gemini libraries not installed. GeminiImageGenerator agent will not function.")
 
+# File extensions for the mime types Gemini returns, so mimetypes is only a fallback
+_IMAGE_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/webp': '.webp'
+}
+
 class GeminiImageGeneratorAgent(BasicAgent):
+    # Shared pool for Azure uploads so several images are written concurrently
+    _upload_executor = ThreadPoolExecutor(max_workers=4)
+
+    # Gemini client reused across requests so its connections stay warm
+    _client = None
+    _client_api_key = None
+    _client_lock = threading.Lock()
+
     def __init__(self):
         self.name = "GeminiImageGenerator"
         self.metadata = {
@@ -49,6 +66,18 @@ class GeminiImageGeneratorAgent(BasicAgent):
         self.gemini_api_key = os.environ.get('GEMINI_API_KEY')
         super().__init__(name=self.name, metadata=self.metadata)
 
+    def _get_client(self):
+        """Returns the process-wide Gemini client, creating it on first use."""
+        cls = type(self)
+        client = cls._client
+        if client is None or cls._client_api_key != self.gemini_api_key:
+            with cls._client_lock:
+                if cls._client is None or cls._client_api_key != self.gemini_api_key:
+                    cls._client = genai.Client(api_key=self.gemini_api_key)
+                    cls._client_api_key = self.gemini_api_key
+                client = cls._client
+        return client
+
     def perform(self, **kwargs):
         """
         Generates an image using Google's Gemini AI model.
@@ -80,8 +109,7 @@ class GeminiImageGeneratorAgent(BasicAgent):
             return "Error: No prompt provided for image generation."
         
         try:
-            # Initialize Gemini client
-            client = genai.Client(api_key=self.gemini_api_key)
+            client = self._get_client()
             model = "gemini-2.5-flash-image-preview"
             
             # Prepare the content request
@@ -106,6 +134,9 @@ class GeminiImageGeneratorAgent(BasicAgent):
             generated_images = []
             generated_text = []
             
+            # Each inline_data part is a complete image, kept as (mime type, bytes)
+            image_buffers = []
+            
             for chunk in client.models.generate_content_stream(
                 model=model,
                 contents=contents,
@@ -117,68 +148,47 @@ class GeminiImageGeneratorAgent(BasicAgent):
                     continue
                 
                 # Check for image data
-                if (chunk.candidates[0].content.parts[0].inline_data and 
-                    chunk.candidates[0].content.parts[0].inline_data.data):
-                    
-                    inline_data = chunk.candidates[0].content.parts[0].inline_data
-                    data_buffer = inline_data.data
-                    mime_type = inline_data.mime_type
-                    file_extension = mimetypes.guess_extension(mime_type) or '.png'
-                    
-                    # Generate filename with timestamp
-                    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                    filename = f"{file_prefix}_{timestamp}{file_extension}"
-                    
-                    if save_to_azure:
-                        # Determine directory structure
-                        if user_guid:
-                            directory = f"generated_images/{user_guid}"
-                        else:
-                            directory = "generated_images/shared"
-                        
-                        # Save to Azure storage
-                        success = self.storage_manager.write_file(
-                            directory_name=directory,
-                            file_name=filename,
-                            content=data_buffer
-                        )
-                        
-                        if success:
-                            # Generate a download URL (valid for 30 minutes)
-                            from datetime import datetime, timedelta
-                            expiry_time = datetime.utcnow() + timedelta(minutes=30)
-                            
-                            download_url = self.storage_manager.generate_download_url(
-                                directory=directory,
-                                filename=filename,
-                                expiry_time=expiry_time
-                            )
-                            
-                            if download_url:
-                                generated_images.append({
-                                    'filename': filename,
-                                    'path': f"{directory}/{filename}",
-                                    'url': download_url,
-                                    'mime_type': mime_type
-                                })
-                            else:
-                                generated_images.append({
-                                    'filename': filename,
-                                    'path': f"{directory}/{filename}",
-                                    'mime_type': mime_type
-                                })
-                    else:
-                        # Just track that we generated an image
-                        generated_images.append({
-                            'filename': filename,
-                            'mime_type': mime_type,
-                            'size': len(data_buffer)
-                        })
+                inline_data = getattr(chunk.candidates[0].content.parts[0], 'inline_data', None)
+                if inline_data and inline_data.data:
+                    image_buffers.append((inline_data.mime_type, inline_data.data))
                         
                 # Check for text response
                 elif hasattr(chunk, 'text') and chunk.text:
                     generated_text.append(chunk.text)
             
+            # Determine directory structure
+            if user_guid:
+                directory = f"generated_images/{user_guid}"
+            else:
+                directory = "generated_images/shared"
+            
+            # Generate filenames with one timestamp, numbering them if there are several
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            
+            uploads = []
+            for index, (mime_type, data_buffer) in enumerate(image_buffers):
+                file_extension = _IMAGE_EXTENSIONS.get(mime_type) or mimetypes.guess_extension(mime_type) or '.png'
+                suffix = f"_{index}" if len(image_buffers) > 1 else ""
+                filename = f"{file_prefix}_{timestamp}{suffix}{file_extension}"
+                
+                if save_to_azure:
+                    uploads.append(self._upload_executor.submit(
+                        self._save_image, directory, filename, data_buffer, mime_type
+                    ))
+                else:
+                    # Just track that we generated an image
+                    generated_images.append({
+                        'filename': filename,
+                        'mime_type': mime_type,
+                        'size': len(data_buffer)
+                    })
+            
+            # Collect uploads in submission order
+            for upload in uploads:
+                saved_image = upload.result()
+                if saved_image:
+                    generated_images.append(saved_image)
+            
             # Prepare response
             if not generated_images:
                 return f"No images were generated for the prompt: '{prompt}'. The model may have refused or failed to generate the requested image."
@@ -228,6 +238,40 @@ class GeminiImageGeneratorAgent(BasicAgent):
             else:
                 return f"Error generating image: {error_msg}"
     
+    def _save_image(self, directory, filename, data_buffer, mime_type):
+        """
+        Saves an image to Azure storage and generates a download URL for it.
+        
+        Returns:
+            dict or None: Image details, or None if the write failed
+        """
+        success = self.storage_manager.write_file(
+            directory_name=directory,
+            file_name=filename,
+            content=data_buffer
+        )
+        
+        if not success:
+            return None
+        
+        # Generate a download URL (valid for 30 minutes)
+        expiry_time = datetime.utcnow() + timedelta(minutes=30)
+        
+        download_url = self.storage_manager.generate_download_url(
+            directory=directory,
+            filename=filename,
+            expiry_time=expiry_time
+        )
+        
+        image = {
+            'filename': filename,
+            'path': f"{directory}/{filename}",
+            'mime_type': mime_type
+        }
+        if download_url:
+            image['url'] = download_url
+        return image
+    
     def list_generated_images(self, user_guid=None, limit=10):
         """
         Helper method to list recently generated images.
@@ -3,26 +3,104 @@ import logging
 import json
 import os
 import importlib
-import importlib.util
-import inspect
 import sys
+import types
 import re
+import hashlib
 from agents.basic_agent import BasicAgent
 import uuid
-from openai import AzureOpenAI
-from datetime import datetime
 import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from utils.azure_file_storage import AzureFileStorageManager, safe_json_loads
 
+# numpy, imported by Assistant._embed the first time embeddings are used
+np = None
+
 # Default GUID to use when no specific user GUID is provided
 # Memorable pattern related to "copilot" that follows UUID format rules
 DEFAULT_USER_GUID = "c0p110t0-aaaa-bbbb-cccc-123456789abc"
 
+# How long agent sources fetched from Azure File Share are reused before the
+# share is listed and read again
+AGENT_RELOAD_INTERVAL = float(os.environ.get('AGENT_RELOAD_INTERVAL', '30'))
+
+# A bare GUID, or one labeled "guid: ..." / "guid=..."
+_GUID_MATCH = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE).match
+_LABELED_GUID_MATCH = re.compile(r'^guid[:=\s]+([0-9a-f-]{36})$', re.IGNORECASE).match
+
+# Agents that touch shared memory context or the agent share, so their calls
+# never run alongside others from the same model turn
+SERIAL_AGENTS = {'ManageMemory', 'ContextMemory', 'LearnNewAgent', 'ToolPipeline'}
+
+# Runs independent agent calls from one model turn concurrently
+_agent_call_executor = ThreadPoolExecutor(max_workers=8)
+
+# Shared AzureOpenAI client, created on first use
+_openai_client = None
+_openai_client_lock = threading.Lock()
+
+# Process-wide Assistant reused by warm requests, and when its agents were loaded
+_shared_assistant = None
+_shared_assistant_loaded_at = None
+_shared_assistant_lock = threading.Lock()
+
+# Answers to repeated prompts in an unchanged context are reused for a while
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '500'))
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', '3600'))
+# Naming an embeddings deployment also lets paraphrased prompts hit the cache,
+# and enables AGENT_TOOL_TOP_K
+EMBEDDING_DEPLOYMENT = os.environ.get('AZURE_OPENAI_EMBEDDING_DEPLOYMENT')
+RESPONSE_CACHE_SIMILARITY = float(os.environ.get('RESPONSE_CACHE_SIMILARITY', '0.9'))
+
+# (context digest, normalized prompt) -> (monotonic time, unit embedding or None, response)
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+# With embeddings enabled, only the AGENT_TOOL_TOP_K agents whose descriptions
+# best match the prompt are offered as tools (0 offers every agent), plus the
+# agents the system prompt tells the model to use
+AGENT_TOOL_TOP_K = int(os.environ.get('AGENT_TOOL_TOP_K', '0'))
+PINNED_AGENTS = {'UniversalDataTranslator', 'IntelligentFormatSynthesis', 'ManageMemory', 'ContextMemory'}
+
+# Agent description -> unit embedding, computed once per distinct description
+_description_embeddings = {}
+
+# Markdown and emoji that shouldn't be read aloud in a voice response
+_VOICE_MARKUP_RE = re.compile(r'\*\*|`|#|>|---|[\U00010000-\U0010ffff]|[\u2600-\u26FF]|[\u2700-\u27BF]')
+
+# Guards the agent loader caches below, which concurrent loads share
+_agent_loader_lock = threading.RLock()
+
+# Azure File Share directory -> (monotonic fetch time, [(file name, source)])
+_azure_agent_sources = {}
+
+# Reads agent files from Azure File Share concurrently when there is no manifest
+_agent_read_executor = ThreadPoolExecutor(max_workers=8)
+
+# (directory, file name) -> (source digest, agent classes); unchanged sources
+# are not compiled or executed again on reload
+_azure_agent_classes = {}
+
+# Module name -> (module, agent classes) for modules already walked. Keyed by
+# name so a re-executed agent replaces its old entry instead of adding one.
+_module_agent_classes = {}
+
+# Local agent file name -> st_mtime_ns when it was last imported
+_local_agent_mtimes = {}
+
 def ensure_string_content(message):
     """
     Ensures message content is converted to a string regardless of input type.
     Handles all edge cases including None, undefined, or missing content.
+    Messages that already have a role and string content are returned as-is,
+    so callers must not mutate the result.
     """
+    # Already normalized - skip the copy
+    if isinstance(message, dict) and 'role' in message and isinstance(message.get('content'), str):
+        return message
+
     # Handle None or non-dict messages
     if message is None:
         return {"role": "user", "content": ""}
@@ -82,128 +160,369 @@ def build_cors_response(origin):
         "Access-Control-Max-Age": "86400",
     }
 
+def fetch_agent_sources(storage_manager, directory_name):
+    """
+    Returns (file name, source) pairs for the *_agent.py files in an Azure
+    File Share directory, reusing the last fetch for AGENT_RELOAD_INTERVAL seconds.
+    Reads the directory's manifest in one request when present, otherwise
+    lists the directory and reads each file.
+    """
+    with _agent_loader_lock:
+        cached = _azure_agent_sources.get(directory_name)
+    if cached and time.monotonic() - cached[0] < AGENT_RELOAD_INTERVAL:
+        return cached[1]
+
+    sources = storage_manager.read_agent_manifest(directory_name)
+    if sources is not None:
+        file_names = [file_name for file_name, _ in sources]
+        complete = True
+    else:
+        file_names = storage_manager.list_agent_files(directory_name)
+        if file_names is None:
+            # Keep serving the last successful fetch and try again next request
+            return cached[1] if cached else []
+
+        # A file that can't be read keeps its previously fetched source
+        previous_sources = dict(cached[1]) if cached else {}
+        contents = _agent_read_executor.map(
+            lambda file_name: storage_manager.read_file(directory_name, file_name), file_names)
+        sources = []
+        complete = True
+        for file_name, file_content in zip(file_names, contents):
+            if file_content is None:
+                file_content = previous_sources.get(file_name)
+            if file_content is None:
+                complete = False
+                continue
+            sources.append((file_name, file_content))
+
+    with _agent_loader_lock:
+        # Only a fetch where every file was read is reused for the full interval
+        if complete:
+            _azure_agent_sources[directory_name] = (time.monotonic(), sources)
+        forget_removed_agents(directory_name, set(file_names))
+    return sources
+
+def forget_removed_agents(directory_name, file_names):
+    """
+    Drops cached classes, and for multi-agents the sys.modules entry, of
+    agent files no longer present in an Azure File Share directory.
+    Module names are stable per file, so this is all that keeps them bounded.
+    """
+    with _agent_loader_lock:
+        for key in [key for key in _azure_agent_classes if key[0] == directory_name and key[1] not in file_names]:
+            del _azure_agent_classes[key]
+            module_name = key[1][:-3]
+            if directory_name == 'multi_agents':
+                module_name = f"multi_agents.{module_name}"
+                sys.modules.pop(module_name, None)
+            _module_agent_classes.pop(module_name, None)
+
+def refresh_agent_manifest(storage_manager, directory_name, file_name, file_content):
+    """Updates one file's entry in a directory's agent manifest, if it has one, after that file changes."""
+    storage_manager.update_agent_manifest(directory_name, file_name, file_content)
+    invalidate_agent_sources(directory_name)
+
+def invalidate_agent_sources(directory_name=None):
+    """Forces the next load to re-read agent sources from Azure File Share."""
+    global _shared_assistant_loaded_at
+    with _agent_loader_lock:
+        if directory_name is None:
+            _azure_agent_sources.clear()
+        else:
+            _azure_agent_sources.pop(directory_name, None)
+    _shared_assistant_loaded_at = None
+
+def _iter_agent_classes(module):
+    """
+    Returns the BasicAgent subclasses defined in a module, walking its
+    namespace only the first time the module object is seen.
+    """
+    with _agent_loader_lock:
+        cached = _module_agent_classes.get(module.__name__)
+    if cached and cached[0] is module:
+        return cached[1]
+
+    agent_classes = [
+        obj for obj in vars(module).values()
+        if isinstance(obj, type) and issubclass(obj, BasicAgent) and obj is not BasicAgent
+    ]
+    with _agent_loader_lock:
+        _module_agent_classes[module.__name__] = (module, agent_classes)
+    return agent_classes
+
+def load_agent_classes(directory_name, file_name, file_content, exec_agent_source):
+    """
+    Returns the BasicAgent subclasses defined by an agent source from Azure
+    File Share, executing it with exec_agent_source only if it changed since
+    the last load.
+    """
+    source_hash = hashlib.blake2b(file_content.encode('utf-8'), digest_size=16).hexdigest()
+    with _agent_loader_lock:
+        cached = _azure_agent_classes.get((directory_name, file_name))
+    if cached and cached[0] == source_hash:
+        return cached[1]
+
+    module = exec_agent_source(file_name, file_content)
+    agent_classes = _iter_agent_classes(module)
+    with _agent_loader_lock:
+        _azure_agent_classes[(directory_name, file_name)] = (source_hash, agent_classes)
+    return agent_classes
+
+def _exec_azure_agent(file_name, file_content):
+    module = types.ModuleType(file_name[:-3])
+    module.__file__ = f"<azure:agents/{file_name}>"
+    exec(compile(file_content, module.__file__, 'exec'), module.__dict__)
+    return module
+
+def _exec_azure_multi_agent(file_name, file_content):
+    module_name = f"multi_agents.{file_name[:-3]}"
+    module = types.ModuleType(module_name)
+    module.__file__ = f"<azure:multi_agents/{file_name}>"
+    module.__package__ = 'multi_agents'
+
+    # Create the multi_agents package if it doesn't exist
+    if 'multi_agents' not in sys.modules:
+        sys.modules['multi_agents'] = types.ModuleType('multi_agents')
+
+    # Add the module to the multi_agents package
+    sys.modules[module_name] = module
+    exec(compile(file_content, module.__file__, 'exec'), module.__dict__)
+    return module
+
+def load_azure_agent(directory_name, file_name, file_content):
+    """Loads a single agent source read from Azure File Share, returning its agents by name."""
+    agents = {}
+    try:
+        exec_agent_source = _exec_azure_multi_agent if directory_name == 'multi_agents' else _exec_azure_agent
+        for agent_class in load_agent_classes(directory_name, file_name, file_content, exec_agent_source):
+            agent_instance = agent_class()
+            agents[agent_instance.name] = agent_instance
+    except Exception as e:
+        logging.error(f"Error loading agent {file_name} from Azure File Share: {str(e)}")
+    return agents
+
 def load_agents_from_folder():
     agents_directory = os.path.join(os.path.dirname(__file__), "agents")
-    files_in_agents_directory = os.listdir(agents_directory)
-    agent_files = [f for f in files_in_agents_directory if f.endswith(".py") and f not in ["__init__.py", "basic_agent.py"]]
+    with os.scandir(agents_directory) as entries:
+        agent_files = [e for e in entries if e.is_file() and e.name.endswith(".py") and e.name not in ("__init__.py", "basic_agent.py")]
 
     declared_agents = {}
-    for file in agent_files:
+    for entry in agent_files:
+        file = entry.name
         try:
             module_name = file[:-3]
             module = importlib.import_module(f'agents.{module_name}')
-            for name, obj in inspect.getmembers(module):
-                if inspect.isclass(obj) and issubclass(obj, BasicAgent) and obj is not BasicAgent:
-                    agent_instance = obj()
-                    declared_agents[agent_instance.name] = agent_instance
+
+            # Re-import a local agent only when its file changed since it was loaded
+            mtime = entry.stat().st_mtime_ns
+            with _agent_loader_lock:
+                last_mtime = _local_agent_mtimes.get(file)
+                if last_mtime is not None and mtime > last_mtime:
+                    module = importlib.reload(module)
+                    _module_agent_classes.pop(module.__name__, None)
+                _local_agent_mtimes[file] = mtime
+
+            for agent_class in _iter_agent_classes(module):
+                agent_instance = agent_class()
+                declared_agents[agent_instance.name] = agent_instance
         except Exception as e:
             logging.error(f"Error loading agent {file}: {str(e)}")
             continue
 
     storage_manager = AzureFileStorageManager()
     try:
-        agent_files = storage_manager.list_files('agents')
+        for file_name, file_content in fetch_agent_sources(storage_manager, 'agents'):
+            try:
+                agent_classes = load_agent_classes('agents', file_name, file_content, _exec_azure_agent)
+                for agent_class in agent_classes:
+                    agent_instance = agent_class()
+                    declared_agents[agent_instance.name] = agent_instance
 
-        for file in agent_files:
-            if not file.name.endswith('_agent.py'):
+            except Exception as e:
+                logging.error(f"Error loading agent {file_name} from Azure File Share: {str(e)}")
                 continue
 
+    except Exception as e:
+        logging.error(f"Error loading agents from Azure File Share: {str(e)}")
+
+    # Load multi-agents from multi_agents folder
+    try:
+        for file_name, file_content in fetch_agent_sources(storage_manager, 'multi_agents'):
             try:
-                file_content = storage_manager.read_file('agents', file.name)
-                if file_content is None:
-                    continue
+                agent_classes = load_agent_classes('multi_agents', file_name, file_content, _exec_azure_multi_agent)
+                for agent_class in agent_classes:
+                    agent_instance = agent_class()
+                    declared_agents[agent_instance.name] = agent_instance
+                    logging.info(f"Loaded multi-agent: {agent_instance.name}")
 
-                temp_dir = "/tmp/agents"
-                os.makedirs(temp_dir, exist_ok=True)
-                temp_file = f"{temp_dir}/{file.name}"
+            except Exception as e:
+                logging.error(f"Error loading multi-agent {file_name} from Azure File Share: {str(e)}")
+                continue
 
-                with open(temp_file, 'w') as f:
-                    f.write(file_content)
+    except Exception as e:
+        logging.error(f"Error loading multi-agents from Azure File Share: {str(e)}")
 
-                if temp_dir not in sys.path:
-                    sys.path.append(temp_dir)
+    return declared_agents
 
-                module_name = file.name[:-3]
-                spec = importlib.util.spec_from_file_location(module_name, temp_file)
-                module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(module)
+def normalize_prompt(prompt):
+    return ' '.join(prompt.lower().split())
+
+def response_cache_scope(user_guid, messages):
+    """Digest of everything other than the prompt that an answer depends on."""
+    return hashlib.blake2b(f"{user_guid}|{json.dumps(messages)}".encode('utf-8'), digest_size=16).hexdigest()
+
+def get_cached_response(scope, prompt_key):
+    """Returns the cached answer to the same normalized prompt in the same context, if still fresh."""
+    with _response_cache_lock:
+        entry = _response_cache.get((scope, prompt_key))
+        if entry and time.monotonic() - entry[0] < RESPONSE_CACHE_TTL:
+            _response_cache.move_to_end((scope, prompt_key))
+            return entry[2]
+    return None
+
+def find_similar_cached_response(scope, embedding):
+    """Returns the fresh cached answer in the same context whose prompt is most similar, if close enough."""
+    now = time.monotonic()
+    with _response_cache_lock:
+        candidates = [entry for key, entry in _response_cache.items()
+                      if key[0] == scope and entry[1] is not None and now - entry[0] < RESPONSE_CACHE_TTL]
+    if not candidates:
+        return None
 
-                for name, obj in inspect.getmembers(module):
-                    if (inspect.isclass(obj) and
-                        issubclass(obj, BasicAgent) and
-                        obj is not BasicAgent):
-                        agent_instance = obj()
-                        declared_agents[agent_instance.name] = agent_instance
+    similarities = np.stack([entry[1] for entry in candidates]) @ embedding
+    best = int(similarities.argmax())
+    if similarities[best] >= RESPONSE_CACHE_SIMILARITY:
+        return candidates[best][2]
+    return None
 
-                os.remove(temp_file)
+def cache_response(scope, prompt_key, embedding, response):
+    with _response_cache_lock:
+        _response_cache[(scope, prompt_key)] = (time.monotonic(), embedding, response)
+        _response_cache.move_to_end((scope, prompt_key))
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
 
-            except Exception as e:
-                logging.error(f"Error loading agent {file.name} from Azure File Share: {str(e)}")
-                continue
+def get_openai_client():
+    """
+    Returns the process-wide AzureOpenAI client. Sharing one client lets every
+    request reuse its pooled HTTP connections instead of opening new ones.
+    """
+    global _openai_client
+    if _openai_client is None:
+        with _openai_client_lock:
+            if _openai_client is None:
+                # Imported here so requests that never build an Assistant (CORS
+                # preflights, rejected payloads) don't pay for loading openai
+                from openai import AzureOpenAI
 
-    except Exception as e:
-        logging.error(f"Error loading agents from Azure File Share: {str(e)}")
+                try:
+                    _openai_client = AzureOpenAI(
+                        api_key=os.environ['AZURE_OPENAI_API_KEY'],
+                        api_version=os.environ['AZURE_OPENAI_API_VERSION'],
+                        azure_endpoint=os.environ['AZURE_OPENAI_ENDPOINT']
+                    )
+                except TypeError:
+                    _openai_client = AzureOpenAI(
+                        api_key=os.environ['AZURE_OPENAI_API_KEY'],
+                        azure_endpoint=os.environ['AZURE_OPENAI_ENDPOINT']
+                    )
+    return _openai_client
+
+# The system prompt is static apart from the assistant's configured name and
+# description (filled in once per Assistant) and the two memory sections
+_SYSTEM_PROMPT_HEAD = """
+<identity>
+You are {assistant_name}, a {characteristic_description} operating within Microsoft Teams.
+Your core capability is to understand, analyze, and connect to ANY data format - from ancient mainframe outputs to cutting-edge quantum data streams.
+</identity>
 
-    # Load multi-agents from multi_agents folder
-    try:
-        multi_agent_files = storage_manager.list_files('multi_agents')
+<core_capabilities>
+You are a Universal Data Connector with these specialized abilities:
+- Pattern Recognition: Detect and analyze ANY data pattern without assumptions (fixed-width, delimited, binary, encoded, encrypted, artistic, biological, etc.)
+- Format Translation: Convert between any data formats (CSV, XML, JSON, SQL, Parquet, and countless exotic formats)
+- Intelligent Analysis: Use AI to understand unknown data formats and generate parsing strategies
+- Adaptive Learning: Learn from successful connections and optimize future operations
+- Zero-Assumption Processing: Never assume a format - always analyze first
+</core_capabilities>
 
-        for file in multi_agent_files:
-            if not file.name.endswith('_agent.py'):
-                continue
+<shared_memory_output>
+These are shared data patterns and connection configurations known to all users:
+"""
 
-            try:
-                file_content = storage_manager.read_file('multi_agents', file.name)
-                if file_content is None:
-                    continue
+_SYSTEM_PROMPT_MIDDLE = """
+</shared_memory_output>
 
-                temp_dir = "/tmp/multi_agents"
-                os.makedirs(temp_dir, exist_ok=True)
-                temp_file = f"{temp_dir}/{file.name}"
+<specific_memory_output>
+These are user-specific data connections and patterns:
+"""
 
-                with open(temp_file, 'w') as f:
-                    f.write(file_content)
+_SYSTEM_PROMPT_TAIL = """
+</specific_memory_output>
 
-                if temp_dir not in sys.path:
-                    sys.path.append(temp_dir)
+<data_connection_principles>
+1. NO FORMAT ASSUMPTIONS: Never assume data is in a standard format. Always analyze first.
+2. PATTERN FIRST: Look for patterns before applying format rules.
+3. HYPOTHESIS TESTING: Generate multiple hypotheses about what the data could be.
+4. ADAPTIVE PARSING: Adjust parsing strategy based on discovered patterns.
+5. PRESERVATION: Never lose information during transformation.
+6. EXOTIC FORMATS: Be ready for anything - morse code, DNA sequences, music notation, alien communications.
+</data_connection_principles>
 
-                # Also add the parent directory to sys.path so imports work
-                parent_dir = "/tmp"
-                if parent_dir not in sys.path:
-                    sys.path.append(parent_dir)
+<context_instructions>
+- When user provides data or files, ALWAYS use UniversalDataTranslator agent FIRST to analyze without assumptions
+- After analysis, use IntelligentFormatSynthesis to convert to desired formats
+- Store successful patterns using ManageMemory for future optimization
+- Never claim to know a format without analysis
+- Be transparent about confidence levels and multiple interpretations
+</context_instructions>
 
-                module_name = file.name[:-3]
-                spec = importlib.util.spec_from_file_location(f"multi_agents.{module_name}", temp_file)
-                module = importlib.util.module_from_spec(spec)
+<agent_usage>
+CRITICAL Data Connection Protocol:
+1. For ANY data input: First use UniversalDataTranslator to analyze patterns
+2. Based on analysis: Use IntelligentFormatSynthesis to convert if needed
+3. Learn and store: Use ManageMemory to save successful patterns
+4. NEVER pretend to have analyzed data without actually calling agents
+5. ALWAYS be explicit about what agents are being used and why
+6. Report actual analysis results, not assumptions
+</agent_usage>
 
-                # Create the multi_agents package if it doesn't exist
-                import types
-                if 'multi_agents' not in sys.modules:
-                    multi_agents_module = types.ModuleType('multi_agents')
-                    sys.modules['multi_agents'] = multi_agents_module
+<response_format>
+CRITICAL: You must structure your response in TWO distinct parts separated by the delimiter |||VOICE|||
 
-                # Add the module to the multi_agents package
-                sys.modules[f"multi_agents.{module_name}"] = module
-                spec.loader.exec_module(module)
+1. FIRST PART (before |||VOICE|||): Your full formatted response
+   - Use **bold** for key findings
+   - Use `code blocks` for data samples
+   - Apply --- for section separators
+   - Show confidence levels as percentages
+   - Display pattern analysis results
+   - Include detected formats and structures
+   - Present multiple hypotheses if confidence < 80%
+   - Provide parsing recommendations
+   - Show field mappings for structured data
+   - Use tables for field definitions
 
-                for name, obj in inspect.getmembers(module):
-                    if (inspect.isclass(obj) and
-                        issubclass(obj, BasicAgent) and
-                        obj is not BasicAgent):
-                        agent_instance = obj()
-                        declared_agents[agent_instance.name] = agent_instance
-                        logging.info(f"Loaded multi-agent: {agent_instance.name}")
+2. SECOND PART (after |||VOICE|||): A concise voice response
+   - Maximum 1-2 sentences
+   - Pure conversational English with NO formatting
+   - Focus on the main discovery or connection status
+   - Example: "I detected a fixed-width format with 12 fields - looks like mainframe output from the 80s."
 
-                os.remove(temp_file)
+EXAMPLE FORMAT:
+**Data Analysis Complete**
 
-            except Exception as e:
-                logging.error(f"Error loading multi-agent {file.name} from Azure File Share: {str(e)}")
-                continue
+Format Detected: Fixed-Width Text (85% confidence)
+Record Length: 120 characters
+Fields Identified: 12
 
-    except Exception as e:
-        logging.error(f"Error loading multi-agents from Azure File Share: {str(e)}")
+Alternative Hypotheses:
+- COBOL data file (65% confidence)  
+- Legacy database export (45% confidence)
 
-    return declared_agents
+|||VOICE|||
+Found a fixed-width format with 12 fields - probably mainframe data.
+</response_format>
+"""
 
 class Assistant:
     def __init__(self, declared_agents):
@@ -212,18 +531,10 @@ class Assistant:
             'characteristic_description': str(os.environ.get('CHARACTERISTIC_DESCRIPTION', 'adaptive universal data pattern analyzer and connector'))
         }
 
-        try:
-            self.client = AzureOpenAI(
-                api_key=os.environ['AZURE_OPENAI_API_KEY'],
-                api_version=os.environ['AZURE_OPENAI_API_VERSION'],
-                azure_endpoint=os.environ['AZURE_OPENAI_ENDPOINT']
-            )
-        except TypeError:
-            self.client = AzureOpenAI(
-                api_key=os.environ['AZURE_OPENAI_API_KEY'],
-                azure_endpoint=os.environ['AZURE_OPENAI_ENDPOINT']
-            )
+        self.client = get_openai_client()
 
+        self._agent_tools = None
+        self._agent_tools_for = None
         self.known_agents = self.reload_agents(declared_agents)
 
         # Set the default user GUID instead of None
@@ -231,6 +542,10 @@ class Assistant:
 
         self.shared_memory = None
         self.user_memory = None
+        self._system_prompt_head = _SYSTEM_PROMPT_HEAD.format(
+            assistant_name=str(self.config.get('assistant_name', 'UniversalDataConnector')),
+            characteristic_description=str(self.config.get('characteristic_description', 'adaptive universal data pattern analyzer and connector'))
+        )
         self.storage_manager = AzureFileStorageManager()
 
         # Initialize with the default user GUID memory
@@ -247,8 +562,7 @@ class Assistant:
             if content is None:
                 return None
             content = str(content).strip()
-            guid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
-            if guid_pattern.match(content):
+            if _GUID_MATCH(content):
                 return content
         return None
 
@@ -286,14 +600,12 @@ class Assistant:
         text_str = str(text).strip()
 
         # Only match if the entire message is just a GUID
-        guid_pattern = re.compile(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', re.IGNORECASE)
-        match = guid_pattern.match(text_str)
+        match = _GUID_MATCH(text_str)
         if match:
             return match.group(0)
 
         # Also allow labeled GUIDs for explicit behavior
-        labeled_guid_pattern = re.compile(r'^guid[:=\s]+([0-9a-f-]{36})$', re.IGNORECASE)
-        match = labeled_guid_pattern.match(text_str)
+        match = _LABELED_GUID_MATCH(text_str)
         if match:
             return match.group(1)
 
@@ -306,6 +618,13 @@ class Assistant:
                 agents_metadata.append(agent.metadata)
         return agents_metadata
 
+    def get_agent_tools(self):
+        """Tool definitions for the known agents, rebuilt only when the agent set is replaced."""
+        if self._agent_tools_for is not self.known_agents:
+            self._agent_tools = [{"type": "function", "function": metadata} for metadata in self.get_agent_metadata()]
+            self._agent_tools_for = self.known_agents
+        return self._agent_tools
+
     def reload_agents(self, agent_objects):
         known_agents = {}
         if isinstance(agent_objects, dict):
@@ -322,129 +641,147 @@ class Assistant:
             logging.warning(f"Unexpected agent_objects type: {type(agent_objects)}")
         return known_agents
 
-    def prepare_messages(self, conversation_history):
-        if not isinstance(conversation_history, list):
-            conversation_history = []
-
-        messages = []
-        current_datetime = datetime.now().strftime("%A, %B %d, %Y at %I:%M %p")
-
-        # System message
-        system_message = {
-            "role": "system",
-            "content": f"""
-<identity>
-You are {str(self.config.get('assistant_name', 'UniversalDataConnector'))}, a {str(self.config.get('characteristic_description', 'adaptive universal data pattern analyzer and connector'))} operating within Microsoft Teams.
-Your core capability is to understand, analyze, and connect to ANY data format - from ancient mainframe outputs to cutting-edge quantum data streams.
-</identity>
-
-<core_capabilities>
-You are a Universal Data Connector with these specialized abilities:
-- Pattern Recognition: Detect and analyze ANY data pattern without assumptions (fixed-width, delimited, binary, encoded, encrypted, artistic, biological, etc.)
-- Format Translation: Convert between any data formats (CSV, XML, JSON, SQL, Parquet, and countless exotic formats)
-- Intelligent Analysis: Use AI to understand unknown data formats and generate parsing strategies
-- Adaptive Learning: Learn from successful connections and optimize future operations
-- Zero-Assumption Processing: Never assume a format - always analyze first
-</core_capabilities>
-
-<shared_memory_output>
-These are shared data patterns and connection configurations known to all users:
-{str(self.shared_memory)}
-</shared_memory_output>
-
-<specific_memory_output>
-These are user-specific data connections and patterns:
-{str(self.user_memory)}
-</specific_memory_output>
-
-<data_connection_principles>
-1. NO FORMAT ASSUMPTIONS: Never assume data is in a standard format. Always analyze first.
-2. PATTERN FIRST: Look for patterns before applying format rules.
-3. HYPOTHESIS TESTING: Generate multiple hypotheses about what the data could be.
-4. ADAPTIVE PARSING: Adjust parsing strategy based on discovered patterns.
-5. PRESERVATION: Never lose information during transformation.
-6. EXOTIC FORMATS: Be ready for anything - morse code, DNA sequences, music notation, alien communications.
-</data_connection_principles>
-
-<context_instructions>
-- When user provides data or files, ALWAYS use UniversalDataTranslator agent FIRST to analyze without assumptions
-- After analysis, use IntelligentFormatSynthesis to convert to desired formats
-- Store successful patterns using ManageMemory for future optimization
-- Never claim to know a format without analysis
-- Be transparent about confidence levels and multiple interpretations
-</context_instructions>
-
-<agent_usage>
-CRITICAL Data Connection Protocol:
-1. For ANY data input: First use UniversalDataTranslator to analyze patterns
-2. Based on analysis: Use IntelligentFormatSynthesis to convert if needed
-3. Learn and store: Use ManageMemory to save successful patterns
-4. NEVER pretend to have analyzed data without actually calling agents
-5. ALWAYS be explicit about what agents are being used and why
-6. Report actual analysis results, not assumptions
-</agent_usage>
-
-<response_format>
-CRITICAL: You must structure your response in TWO distinct parts separated by the delimiter |||VOICE|||
+    def _embed(self, texts):
+        """Unit-length embeddings of texts, or None when embeddings are off or fail."""
+        global np
+        if not EMBEDDING_DEPLOYMENT:
+            return None
+        if np is None:
+            # Imported here so workers without an embeddings deployment never load numpy
+            try:
+                import numpy as np
+            except ImportError:
+                return None
+        try:
+            response = self.client.embeddings.create(model=EMBEDDING_DEPLOYMENT, input=texts)
+            embeddings = np.asarray([item.embedding for item in response.data], dtype=np.float32)
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            return embeddings / np.where(norms == 0, 1, norms)
+        except Exception as e:
+            logging.warning(f"Error creating embeddings: {str(e)}")
+            return None
 
-1. FIRST PART (before |||VOICE|||): Your full formatted response
-   - Use **bold** for key findings
-   - Use `code blocks` for data samples
-   - Apply --- for section separators
-   - Show confidence levels as percentages
-   - Display pattern analysis results
-   - Include detected formats and structures
-   - Present multiple hypotheses if confidence < 80%
-   - Provide parsing recommendations
-   - Show field mappings for structured data
-   - Use tables for field definitions
+    def _embed_prompt(self, prompt_key):
+        """Unit-length embedding of a normalized prompt, or None when semantic caching is off or fails."""
+        embeddings = self._embed([prompt_key])
+        return embeddings[0] if embeddings is not None else None
+
+    def select_agent_tools(self, prompt_embedding):
+        """
+        Returns the tools to offer for a prompt: with AGENT_TOOL_TOP_K set, the
+        closest matches by description plus PINNED_AGENTS, otherwise None to
+        offer every agent.
+        """
+        tools = self.get_agent_tools()
+        if AGENT_TOOL_TOP_K <= 0 or prompt_embedding is None or len(tools) <= AGENT_TOOL_TOP_K:
+            return None
 
-2. SECOND PART (after |||VOICE|||): A concise voice response
-   - Maximum 1-2 sentences
-   - Pure conversational English with NO formatting
-   - Focus on the main discovery or connection status
-   - Example: "I detected a fixed-width format with 12 fields - looks like mainframe output from the 80s."
+        descriptions = [str(tool['function'].get('description', '')) for tool in tools]
+        missing = [description for description in dict.fromkeys(descriptions) if description not in _description_embeddings]
+        if missing:
+            embeddings = self._embed(missing)
+            if embeddings is None:
+                return None
+            _description_embeddings.update(zip(missing, embeddings))
 
-EXAMPLE FORMAT:
-**Data Analysis Complete**
+        similarities = np.stack([_description_embeddings[description] for description in descriptions]) @ prompt_embedding
+        top = set(np.argpartition(-similarities, AGENT_TOOL_TOP_K)[:AGENT_TOOL_TOP_K].tolist())
+        return [tool for index, tool in enumerate(tools)
+                if index in top or tool['function'].get('name') in PINNED_AGENTS]
 
-Format Detected: Fixed-Width Text (85% confidence)
-Record Length: 120 characters
-Fields Identified: 12
+    def _build_system_message(self):
+        return {
+            "role": "system",
+            "content": (self._system_prompt_head + str(self.shared_memory) +
+                        _SYSTEM_PROMPT_MIDDLE + str(self.user_memory) + _SYSTEM_PROMPT_TAIL)
+        }
 
-Alternative Hypotheses:
-- COBOL data file (65% confidence)  
-- Legacy database export (45% confidence)
+    def prepare_messages(self, conversation_history, skip_first_message=None):
+        if not isinstance(conversation_history, list):
+            conversation_history = []
 
-|||VOICE|||
-Found a fixed-width format with 12 fields - probably mainframe data.
-</response_format>
-"""
-        }
-        messages.append(ensure_string_content(system_message))
+        messages = [self._build_system_message()]
 
-        # Process conversation history - skip first message if it's just a GUID
-        guid_only_first_message = self._check_first_message_for_guid(conversation_history)
-        start_idx = 1 if guid_only_first_message else 0
+        # Process conversation history - skip first message if it's just a GUID.
+        # Callers that already checked pass the result as skip_first_message.
+        if skip_first_message is None:
+            skip_first_message = bool(self._check_first_message_for_guid(conversation_history))
+        start_idx = 1 if skip_first_message else 0
 
-        for i in range(start_idx, len(conversation_history)):
-            messages.append(ensure_string_content(conversation_history[i]))
+        messages.extend(map(ensure_string_content, conversation_history[start_idx:]))
 
         return messages
 
-    def get_openai_api_call(self, messages):
+    def get_openai_api_call(self, messages, tools=None):
         try:
             response = self.client.chat.completions.create(
                 model="gpt-5-chat",
                 messages=messages,
-                functions=self.get_agent_metadata(),
-                function_call="auto"
+                tools=tools if tools is not None else self.get_agent_tools(),
+                tool_choice="auto"
             )
             return response
         except Exception as e:
             logging.error(f"Error in OpenAI API call: {str(e)}")
             raise
 
+    def perform_agent(self, agent_name, json_data):
+        """Runs one agent call requested by the model and returns its result as a string."""
+        agent = self.known_agents.get(agent_name)
+        if agent is None:
+            raise ValueError(f"Agent '{agent_name}' does not exist")
+        logging.info(f"JSON data before parsing: {json_data}")
+        agent_parameters = safe_json_loads(json_data)
+
+        # Sanitize parameters - ensure none are undefined or None
+        sanitized_parameters = {}
+        for key, value in agent_parameters.items():
+            if value is None:
+                sanitized_parameters[key] = ""  # Convert None to empty string
+            else:
+                sanitized_parameters[key] = value
+
+        # Add user_guid to agent parameters if agent accepts it
+        # Always use the current user_guid (which might be the default)
+        if agent_name in ['ManageMemory', 'ContextMemory']:
+            sanitized_parameters['user_guid'] = self.user_guid
+
+        # Pipelines run each step through this method, so steps get the same
+        # sanitizing, user_guid injection and LearnNewAgent handling
+        if agent_name == 'ToolPipeline':
+            sanitized_parameters['run_agent'] = self.perform_agent
+
+        # Always perform agent call - no caching
+        result = agent.perform(**sanitized_parameters)
+
+        # A newly learned agent is loaded on its own right away so the model can
+        # call it this turn, and added to the manifest so the next load sees it
+        if agent_name == 'LearnNewAgent':
+            learned_file = ''.join(c for c in str(sanitized_parameters.get('agent_name', '')) if c.isalnum()) + '_agent.py'
+            learned_source = self.storage_manager.read_file('agents', learned_file)
+            learned_agents = load_azure_agent('agents', learned_file, learned_source) if learned_source else {}
+            if learned_agents:
+                self.known_agents = {**self.known_agents, **learned_agents}
+                refresh_agent_manifest(self.storage_manager, 'agents', learned_file, learned_source)
+
+        # Ensure result is a string
+        if result is None:
+            return "Agent completed successfully"
+        return str(result)
+
+    def perform_agent_calls(self, calls):
+        """
+        Runs the (call id, agent name, arguments) calls from one model turn and
+        returns their results in order. Calls to distinct agents run
+        concurrently; repeated agents and agents in SERIAL_AGENTS run in order.
+        """
+        agent_names = [agent_name for _, agent_name, _ in calls]
+        if len(calls) > 1 and len(set(agent_names)) == len(agent_names) and not SERIAL_AGENTS.intersection(agent_names):
+            futures = [_agent_call_executor.submit(self.perform_agent, agent_name, json_data)
+                       for _, agent_name, json_data in calls]
+            return [future.result() for future in futures]
+        return [self.perform_agent(agent_name, json_data) for _, agent_name, json_data in calls]
+
     def parse_response_with_voice(self, content):
         """Parse the response to extract formatted and voice parts"""
         if not content:
@@ -461,14 +798,10 @@ Found a fixed-width format with 12 fields - probably mainframe data.
             # No voice delimiter found, generate a simple voice response
             formatted_response = content.strip()
             # Extract a simple summary for voice
-            sentences = formatted_response.split('.')
-            if sentences:
-                voice_response = sentences[0].strip() + "."
-                # Remove any formatting from voice response
-                voice_response = re.sub(r'\*\*|`|#|>|---|[\U00010000-\U0010ffff]|[\u2600-\u26FF]|[\u2700-\u27BF]', '', voice_response)
-                voice_response = re.sub(r'\s+', ' ', voice_response).strip()
-            else:
-                voice_response = "I've completed your request."
+            first_sentence = formatted_response.partition('.')[0]
+            voice_response = first_sentence.strip() + "."
+            # Remove any formatting from voice response, then collapse whitespace
+            voice_response = ' '.join(_VOICE_MARKUP_RE.sub('', voice_response).split())
 
         return formatted_response, voice_response
 
@@ -500,89 +833,98 @@ Found a fixed-width format with 12 fields - probably mainframe data.
             voice = "Data patterns loaded - ready to connect to any format."
             return formatted, voice, ""
 
-        messages = self.prepare_messages(conversation_history)
+        messages = self.prepare_messages(conversation_history, skip_first_message=bool(guid_from_history))
+
+        # Reuse an earlier answer to the same (or, with embeddings, a similar)
+        # prompt asked in exactly this context
+        prompt_key = normalize_prompt(prompt)
+        cache_scope = response_cache_scope(self.user_guid, messages)
+        prompt_embedding = None
+        cached_response = get_cached_response(cache_scope, prompt_key)
+        if cached_response is None:
+            prompt_embedding = self._embed_prompt(prompt_key)
+            if prompt_embedding is not None:
+                cached_response = find_similar_cached_response(cache_scope, prompt_embedding)
+        if cached_response is not None:
+            return cached_response
+
         messages.append(ensure_string_content({"role": "user", "content": prompt}))
 
+        # Offer the same tools on every turn of this request (None offers all)
+        tools = self.select_agent_tools(prompt_embedding)
+
         agent_logs = []
         retry_count = 0
         needs_follow_up = False
 
         while retry_count < max_retries:
             try:
-                response = self.get_openai_api_call(messages)
+                response = self.get_openai_api_call(messages, tools)
                 assistant_msg = response.choices[0].message
                 msg_contents = assistant_msg.content or ""  # Ensure content is never None
 
-                if not assistant_msg.function_call:
+                if not assistant_msg.tool_calls:
                     formatted_response, voice_response = self.parse_response_with_voice(msg_contents)
+                    # Answers that ran agents had side effects and must not be replayed
+                    if not agent_logs:
+                        cache_response(cache_scope, prompt_key, prompt_embedding, (formatted_response, voice_response, ""))
                     return formatted_response, voice_response, "\n".join(map(str, agent_logs))
 
-                agent_name = str(assistant_msg.function_call.name)
-                agent = self.known_agents.get(agent_name)
-
-                if not agent:
-                    return f"Agent '{agent_name}' does not exist", "I couldn't find that agent.", ""
+                # One model turn may ask for several agents at once
+                calls = [(tool_call.id, str(tool_call.function.name), ensure_string_function_args(tool_call.function))
+                         for tool_call in assistant_msg.tool_calls]
 
-                # Process function call arguments
-                json_data = ensure_string_function_args(assistant_msg.function_call)
-                logging.info(f"JSON data before parsing: {json_data}")
+                for _, agent_name, _ in calls:
+                    if agent_name not in self.known_agents:
+                        return f"Agent '{agent_name}' does not exist", "I couldn't find that agent.", ""
 
+                known_agents = self.known_agents
                 try:
-                    agent_parameters = safe_json_loads(json_data)
-
-                    # Sanitize parameters - ensure none are undefined or None
-                    sanitized_parameters = {}
-                    for key, value in agent_parameters.items():
-                        if value is None:
-                            sanitized_parameters[key] = ""  # Convert None to empty string
-                        else:
-                            sanitized_parameters[key] = value
-
-                    # Add user_guid to agent parameters if agent accepts it
-                    # Always use the current user_guid (which might be the default)
-                    if agent_name in ['ManageMemory', 'ContextMemory']:
-                        sanitized_parameters['user_guid'] = self.user_guid
-
-                    # Always perform agent call - no caching
-                    result = agent.perform(**sanitized_parameters)
-
-                    # Ensure result is a string
-                    if result is None:
-                        result = "Agent completed successfully"
-                    else:
-                        result = str(result)
-
-                    agent_logs.append(f"Performed {agent_name} and got result: {result}")
-
+                    results = self.perform_agent_calls(calls)
                 except Exception as e:
                     return f"Error parsing parameters: {str(e)}", "I hit an error processing that.", ""
 
-                # Add the function result to messages
+                # Add the tool calls and their results to messages
                 messages.append({
-                    "role": "function",
-                    "name": agent_name,
-                    "content": result
+                    "role": "assistant",
+                    "content": assistant_msg.content,
+                    "tool_calls": [
+                        {"id": call_id, "type": "function", "function": {"name": agent_name, "arguments": json_data or "{}"}}
+                        for call_id, agent_name, json_data in calls
+                    ]
                 })
+                # Re-rank so a newly learned agent is considered for the rest of the request
+                if tools is not None and self.known_agents is not known_agents:
+                    tools = self.select_agent_tools(prompt_embedding)
 
-                # EVALUATION: Check if we need a follow-up function call
-                try:
-                    result_json = json.loads(result)
-                    # Look for error indicators or incomplete data flags
-                    needs_follow_up = False
-                    if isinstance(result_json, dict):
-                        # Check for error indicators
-                        if result_json.get('error') or result_json.get('status') == 'incomplete':
-                            needs_follow_up = True
-                        # Check for specific indicators that another action is needed
-                        if result_json.get('requires_additional_action') == True:
-                            needs_follow_up = True
-                except:
-                    # If we can't parse the result as JSON, assume no follow-up needed
-                    needs_follow_up = False
+                for (call_id, agent_name, _), result in zip(calls, results):
+                    agent_logs.append(f"Performed {agent_name} and got result: {result}")
+                    messages.append({
+                        "role": "tool",
+                        "tool_call_id": call_id,
+                        "content": result
+                    })
+
+                # EVALUATION: Check if any result needs a follow-up function call
+                needs_follow_up = False
+                for result in results:
+                    try:
+                        result_json = json.loads(result)
+                        # Look for error indicators or incomplete data flags
+                        if isinstance(result_json, dict):
+                            # Check for error indicators
+                            if result_json.get('error') or result_json.get('status') == 'incomplete':
+                                needs_follow_up = True
+                            # Check for specific indicators that another action is needed
+                            if result_json.get('requires_additional_action') == True:
+                                needs_follow_up = True
+                    except:
+                        # If we can't parse the result as JSON, assume no follow-up needed
+                        pass
 
                 # If we don't need a follow-up, get the final response and return
                 if not needs_follow_up:
-                    final_response = self.get_openai_api_call(messages)
+                    final_response = self.get_openai_api_call(messages, tools)
                     final_msg = final_response.choices[0].message
                     final_content = final_msg.content or ""  # Ensure content is never None
                     formatted_response, voice_response = self.parse_response_with_voice(final_content)
@@ -599,6 +941,31 @@ Found a fixed-width format with 12 fields - probably mainframe data.
 
         return "Service temporarily unavailable. Please try again later.", "Service is down - try again later.", ""
 
+def checkout_assistant():
+    """
+    Returns (assistant, shared). The process-wide Assistant is handed out when
+    no other request holds it, reloading its agents every AGENT_RELOAD_INTERVAL
+    seconds or after an agent changed; a concurrent request gets a fresh
+    Assistant so per-user state never mixes. When shared is True the caller
+    must release _shared_assistant_lock once done.
+    """
+    global _shared_assistant, _shared_assistant_loaded_at
+    if not _shared_assistant_lock.acquire(blocking=False):
+        return Assistant(load_agents_from_folder()), False
+
+    try:
+        now = time.monotonic()
+        if _shared_assistant is None:
+            _shared_assistant = Assistant(load_agents_from_folder())
+            _shared_assistant_loaded_at = now
+        elif _shared_assistant_loaded_at is None or now - _shared_assistant_loaded_at >= AGENT_RELOAD_INTERVAL:
+            _shared_assistant.known_agents = _shared_assistant.reload_agents(load_agents_from_folder())
+            _shared_assistant_loaded_at = now
+    except Exception:
+        _shared_assistant_lock.release()
+        raise
+    return _shared_assistant, True
+
 app = func.FunctionApp()
 
 @app.route(route="businessinsightbot_function", auth_level=func.AuthLevel.FUNCTION)
@@ -646,10 +1013,11 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
     user_guid = req_body.get('user_guid')
 
     # Skip validation if input is just a GUID to load memory
-    is_guid_only = re.match(r'^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$', user_input.strip(), re.IGNORECASE)
+    stripped_input = user_input.strip()
+    is_guid_only = _GUID_MATCH(stripped_input)
 
     # Validate user input for non-GUID requests
-    if not is_guid_only and not user_input.strip():
+    if not is_guid_only and not stripped_input:
         return func.HttpResponse(
             json.dumps({
                 "error": "Missing or empty user_input in JSON payload"
@@ -660,29 +1028,34 @@ def main(req: func.HttpRequest) -> func.HttpResponse:
         )
 
     try:
-        agents = load_agents_from_folder()
-        # Create a new Assistant instance for each request
-        assistant = Assistant(agents)
-
-        # Set user_guid if provided in the request or found in input
-        if user_guid:
-            assistant.user_guid = user_guid
-            assistant._initialize_context_memory(user_guid)
-        elif is_guid_only:
-            assistant.user_guid = user_input.strip()
-            assistant._initialize_context_memory(user_input.strip())
-        # Otherwise, the default GUID will be used (already set in __init__)
-
-        assistant_response, voice_response, agent_logs = assistant.get_response(
-            user_input, conversation_history)
-
-        # Include GUID and voice response in output
-        response = {
-            "assistant_response": str(assistant_response),
-            "voice_response": str(voice_response),
-            "agent_logs": str(agent_logs),
-            "user_guid": assistant.user_guid  # Return the GUID in use (could be default or provided)
-        }
+        assistant, shared = checkout_assistant()
+        try:
+            # Set user_guid if provided in the request or found in input. A
+            # reused Assistant reloads memory every time, since it may have changed
+            if user_guid:
+                assistant.user_guid = user_guid
+                assistant._initialize_context_memory(user_guid)
+            elif is_guid_only:
+                assistant.user_guid = stripped_input
+                assistant._initialize_context_memory(stripped_input)
+            elif shared:
+                assistant.user_guid = DEFAULT_USER_GUID
+                assistant._initialize_context_memory(DEFAULT_USER_GUID)
+            # Otherwise, the default GUID will be used (already set in __init__)
+
+            assistant_response, voice_response, agent_logs = assistant.get_response(
+                user_input, conversation_history)
+
+            # Include GUID and voice response in output
+            response = {
+                "assistant_response": str(assistant_response),
+                "voice_response": str(voice_response),
+                "agent_logs": str(agent_logs),
+                "user_guid": assistant.user_guid  # Return the GUID in use (could be default or provided)
+            }
+        finally:
+            if shared:
+                _shared_assistant_lock.release()
 
         return func.HttpResponse(
             json.dumps(response),
@@ -2,9 +2,14 @@ import json
 import os
 import logging
 import re
+import base64
+import hashlib
 from datetime import datetime, timedelta, timezone
 from azure.storage.file import FileService
 
+# Bundles every *_agent.py source in a directory so loaders can fetch them in one read
+AGENT_MANIFEST_FILE = '_manifest.json'
+
 def safe_json_loads(json_str):
     """
     Safely loads JSON string, handling potential errors.
@@ -340,7 +345,8 @@ class AzureFileStorageManager:
             
             return binary_stream.content
         except Exception as e:
-            logging.error(f"Error reading binary file: {str(e)}")
+            if "ResourceNotFound" not in str(e):
+                logging.error(f"Error reading binary file: {str(e)}")
             return None
 
     def list_files(self, directory_name):
@@ -492,11 +498,119 @@ class AzureFileStorageManager:
 
     def get_cached_data(self, cache_key):
         """Retrieve cached data if still valid."""
+        cached = self.get_cached_entry(cache_key)
+        return cached[0] if cached else None
+
+    def get_cached_entry(self, cache_key):
+        """
+        Retrieve cached data and how long it stays valid.
+        
+        Returns:
+            tuple or None: (data, remaining seconds), or None if missing or expired
+        """
         cache_entry = self.read_json_from_path("data_cache", f"{cache_key}.json")
         if cache_entry:
             # Check if still valid
             timestamp = datetime.fromisoformat(cache_entry['timestamp'])
             ttl = cache_entry.get('ttl', 300)
-            if datetime.now() - timestamp < timedelta(seconds=ttl):
-                return cache_entry.get('data')
-        return None
\ No newline at end of file
+            remaining = (timestamp + timedelta(seconds=ttl) - datetime.now()).total_seconds()
+            if remaining > 0:
+                return cache_entry.get('data'), remaining
+        return None
+
+    def list_agent_files(self, directory_name):
+        """
+        List the *_agent.py files in an agents directory.
+        
+        Args:
+            directory_name (str): The agents directory (e.g. 'agents', 'multi_agents')
+            
+        Returns:
+            list or None: File names (empty if the directory doesn't exist), or None if listing failed
+        """
+        try:
+            return [
+                file.name
+                for file in self.file_service.list_directories_and_files(self.share_name, directory_name)
+                if file.name.endswith('_agent.py')
+            ]
+        except Exception as e:
+            if "ResourceNotFound" in str(e):
+                return []
+            logging.error(f"Error listing agent files in {directory_name}: {str(e)}")
+            return None
+
+    def read_agent_manifest(self, directory_name):
+        """
+        Read the agent manifest for a directory.
+        
+        Args:
+            directory_name (str): The agents directory (e.g. 'agents', 'multi_agents')
+            
+        Returns:
+            list or None: (file name, source) pairs, or None if there is no valid manifest
+        """
+        manifest = self.read_json_from_path(directory_name, AGENT_MANIFEST_FILE)
+        if not manifest or not isinstance(manifest.get('files'), dict):
+            return None
+        try:
+            return [
+                (file_name, base64.b64decode(entry['content_b64']).decode('utf-8'))
+                for file_name, entry in manifest['files'].items()
+            ]
+        except Exception as e:
+            logging.error(f"Error decoding agent manifest in {directory_name}: {str(e)}")
+            return None
+
+    def update_agent_manifest(self, directory_name, file_name, content):
+        """
+        Replace one file's entry in a directory's agent manifest, if it has one.
+        
+        Args:
+            directory_name (str): The agents directory (e.g. 'agents', 'multi_agents')
+            file_name (str): The *_agent.py file that changed
+            content (str): The file's new source
+            
+        Returns:
+            bool: True if the manifest was updated, False if there is none or the write failed
+        """
+        manifest = self.read_json_from_path(directory_name, AGENT_MANIFEST_FILE)
+        if not manifest or not isinstance(manifest.get('files'), dict):
+            return False
+        encoded = content.encode('utf-8')
+        manifest['files'][file_name] = {
+            'sha256': hashlib.sha256(encoded).hexdigest(),
+            'content_b64': base64.b64encode(encoded).decode('ascii')
+        }
+        manifest['generated_at'] = datetime.now().isoformat()
+        return self.write_json_to_path(manifest, directory_name, AGENT_MANIFEST_FILE)
+
+    def write_agent_manifest(self, directory_name):
+        """
+        Write the agent manifest for a directory from its current *_agent.py files.
+        
+        Args:
+            directory_name (str): The agents directory (e.g. 'agents', 'multi_agents')
+            
+        Returns:
+            bool: Success or failure
+        """
+        file_names = self.list_agent_files(directory_name)
+        if file_names is None:
+            return False
+        files = {}
+        for file_name in file_names:
+            content = self.read_file(directory_name, file_name)
+            if not isinstance(content, str):
+                logging.error(f"Agent manifest for {directory_name} not written: could not read {file_name}")
+                return False
+            encoded = content.encode('utf-8')
+            files[file_name] = {
+                'sha256': hashlib.sha256(encoded).hexdigest(),
+                'content_b64': base64.b64encode(encoded).decode('ascii')
+            }
+        manifest = {
+            'generated_at': datetime.now().isoformat(),
+            'files': files
+        }
+        return self.write_json_to_path(manifest, directory_name, AGENT_MANIFEST_FILE)
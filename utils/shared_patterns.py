@@ -0,0 +1,111 @@
+import atexit
+import threading
+import time
+
+
+class SharedPatterns:
+    """
+    Learned patterns shared by every instance of an agent in this process.
+
+    The stored copy is re-read at most once per TTL, by one thread at a time,
+    and only replaces the in-memory patterns when that can't discard unsaved
+    learnings. Changes are written back by a daemon thread at most once per
+    flush interval, and once more at exit.
+    """
+
+    def __init__(self, name, ttl, flush_interval, snapshot):
+        """
+        Args:
+            name (str): Name of the background flusher thread
+            ttl (float): Seconds before the stored copy is read again
+            flush_interval (float): Seconds between background writes
+            snapshot (callable): Returns a serializable copy of the patterns;
+                called with lock held
+        """
+        self.name = name
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.snapshot = snapshot
+        # Guards patterns; hold it while reading or updating them
+        self.lock = threading.Lock()
+        self.patterns = None
+        self._loaded_at = 0.0
+        self._refresh_lock = threading.Lock()
+        # Bumped on every change; the saved generation is the newest one
+        # known to be written to storage
+        self._generation = 0
+        self._saved_generation = 0
+        self._pending_save = None
+        self._flusher = None
+        atexit.register(self.flush)
+
+    def load(self, read, empty):
+        """
+        Return the shared patterns, re-reading them once the TTL expires.
+
+        Args:
+            read (callable): Returns the stored patterns, or None if unavailable
+            empty (callable): Builds the patterns to start with if nothing is stored
+        """
+        patterns = self.patterns
+        if patterns is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return patterns
+
+        # One thread refreshes at a time; the others keep using the current copy
+        if not self._refresh_lock.acquire(blocking=patterns is None):
+            return patterns
+        try:
+            patterns = self.patterns
+            if patterns is not None and time.monotonic() - self._loaded_at < self.ttl:
+                return patterns
+
+            with self.lock:
+                generation = self._generation
+                persisted = self._saved_generation == generation
+            stored = read()
+            with self.lock:
+                # Only swap in the stored copy if every change was written before
+                # the read began and nothing changed while it ran
+                if self.patterns is None:
+                    self.patterns = stored if stored is not None else empty()
+                elif stored is not None and persisted and self._generation == generation:
+                    self.patterns = stored
+                self._loaded_at = time.monotonic()
+                return self.patterns
+        finally:
+            self._refresh_lock.release()
+
+    def changed(self, save):
+        """
+        Record a change to the patterns and schedule a background write.
+
+        Must be called with lock held. save(snapshot) writes the snapshot to
+        storage and returns True on success.
+        """
+        self._generation += 1
+        self._pending_save = save
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._run_flusher, name=self.name, daemon=True)
+            self._flusher.start()
+
+    def flush(self):
+        """Write the patterns now if anything changed since the last write."""
+        with self.lock:
+            save = self._pending_save
+            if save is None:
+                return
+            self._pending_save = None
+            generation = self._generation
+            snapshot = self.snapshot(self.patterns or {})
+        saved = save(snapshot)
+        with self.lock:
+            if saved:
+                self._saved_generation = max(self._saved_generation, generation)
+            elif self._pending_save is None:
+                # Retry on the next interval (or at exit) instead of waiting for a new change
+                self._pending_save = save
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()